@@ -0,0 +1,98 @@
+"""numba-compiled numeric kernels for the battery model extraction
+
+kept in a dedicated module so callers can fall back to pure numpy when numba
+is not installed, and so the on-disk JIT cache (cache=True) is shared between
+scripts instead of recompiling on every run
+
+every kernel declares an eager signature: the compile happens once at first
+import and is written to the cache, instead of lazily on the first call of
+every fresh process
+"""
+
+import numpy as np
+from numba import njit, prange
+
+@njit('f8(f8, f8[:], f8[:])', cache=True, fastmath=True)
+def _interp_point(xq, xp, fp):
+    """linearly interpolate a single point with endpoint linear extrapolation"""
+    n = xp.size
+    #degenerate curves (0 or 1 points) can't support interpolation
+    if n < 2:
+        return fp[0] if n == 1 else np.nan
+    if xq <= xp[0]:
+        slope = (fp[1] - fp[0])/(xp[1] - xp[0])
+        return fp[0] + slope*(xq - xp[0])
+    if xq >= xp[n - 1]:
+        slope = (fp[n - 1] - fp[n - 2])/(xp[n - 1] - xp[n - 2])
+        return fp[n - 1] + slope*(xq - xp[n - 1])
+    hi = np.searchsorted(xp, xq)
+    lo = hi - 1
+    frac = (xq - xp[lo])/(xp[hi] - xp[lo])
+    return fp[lo] + frac*(fp[hi] - fp[lo])
+
+@njit('UniTuple(f8[:], 2)(f8[:], f8[:,:], f8[:,:], i8[:], f8[:])',
+      cache=True, parallel=True, fastmath=True)
+def fit_line_batch(dod_query, dod_curves, v_curves, lengths, x):
+    """interpolate every discharge curve at every queried dod and fit V = ocv - rs*I
+
+    dod_curves/v_curves are (n_curves, max_len) arrays padded to the longest
+    curve, with lengths holding each curve's true size. Returns (rs, ocv)
+    arrays the same length as dod_query. The degree-1 least-squares fit is
+    solved in closed form since the current vector x is shared by every dod.
+    """
+    n_curves = x.size
+    n_query = dod_query.size
+
+    #a crop window this narrow leaves a curve without enough points to fit --
+    #fail loudly instead of reading past the padded arrays
+    for j in range(n_curves):
+        if lengths[j] < 2:
+            raise ValueError('each discharge curve needs at least 2 points inside the crop window')
+
+    x_mean = x.mean()
+    denom = 0.0
+    for j in range(n_curves):
+        denom += (x[j] - x_mean)**2
+
+    rs = np.empty(n_query)
+    ocv = np.empty(n_query)
+
+    for i in prange(n_query):
+        y = np.empty(n_curves)
+        y_mean = 0.0
+        for j in range(n_curves):
+            y[j] = _interp_point(dod_query[i], dod_curves[j, :lengths[j]], v_curves[j, :lengths[j]])
+            y_mean += y[j]
+        y_mean /= n_curves
+
+        slope = 0.0
+        for j in range(n_curves):
+            slope += (x[j] - x_mean)*(y[j] - y_mean)
+        slope /= denom
+
+        rs[i] = -slope
+        ocv[i] = y_mean - slope*x_mean
+
+    return rs, ocv
+
+@njit('f8[:,:](f8[:], f8[:], f8[:], f8[:], f8)',
+      cache=True, parallel=True, fastmath=True)
+def modeled_v_batch(dod, crates, alpha, beta, nom_cap_Ah):
+    """polynomial-model terminal voltage for every c-rate at every dod
+
+    evaluates ocv(dod) and rs(dod) once per dod by Horner's rule, parallel
+    over the dod grid, then broadcasts over the c-rates. Returns an array of
+    shape (crates.size, dod.size).
+    """
+    out = np.empty((crates.size, dod.size))
+    for i in prange(dod.size):
+        d = dod[i]
+        ocv = 0.0
+        for k in range(alpha.size - 1, -1, -1):
+            ocv = ocv*d + alpha[k]
+        rs = 0.0
+        for k in range(beta.size - 1, -1, -1):
+            rs = rs*d + beta[k]
+        for j in range(crates.size):
+            out[j, i] = ocv - crates[j]*nom_cap_Ah*rs
+    return out
@@ -1,10 +1,38 @@
 from pathlib import Path
+import functools
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
 import matplotlib.pyplot as plt
-from typing import Optional, Union
+from typing import Union
 import enum
 
+@functools.lru_cache(maxsize=8)
+def _read_all_sheets(abs_path: str, mtime_ns: int) -> tuple:
+    """parse every sheet of a workbook into (c_rate, x, v) numpy triples
+
+    cached across DischargeData instances keyed on (path, mtime) so repeated
+    instantiations on an unchanged file skip the XLSX parse entirely; putting
+    the mtime in the key invalidates the entry automatically when the file
+    changes. The returned arrays are never mutated by callers.
+    """
+    #pd.ExcelFile keeps the parsed workbook around so each sheet read below
+    #doesn't re-open and re-parse the whole file; the with-block makes sure the
+    #file handle is closed once all sheets are parsed
+    sheets = []
+    with pd.ExcelFile(abs_path, engine='openpyxl') as xls:
+        for sheet in xls.sheet_names:
+            #extract c-rate from sheet name (this assumes sheets are named with convention "c_rate 1.2" or similar)
+            c_rate = float(sheet.split()[-1])
+            #the spreadsheet must have a first column of capacity in Ah or DoD and a second column of voltage
+            #pin usecols/dtype so pandas skips type inference and ignores any stray columns
+            #float32 is plenty for measured discharge curves and halves the memory
+            #traffic of every downstream pass; the fit itself up-casts to float64
+            values = xls.parse(sheet, names=['x_col', 'V'], header=0, usecols=[0, 1],
+                               dtype={'x_col': 'float32', 'V': 'float32'}).to_numpy()
+            sheets.append((c_rate, values[:, 0], values[:, 1]))
+
+    return tuple(sheets)
+
 class DischargeVar(enum.Enum):
     DOD = enum.auto()
     SOC = enum.auto()
@@ -43,15 +71,39 @@ class DischargeData():
         """
         
         #specify data types for attributes set in "load_data" method
-        self._data: pd.DataFrame
+        self._arrays: dict[str, np.ndarray]
+        self._crate_slices: dict[float, slice]
         self.nominal_capacity_Ah: float
         
         #load data from excel file
         self.load_data(file=file, nominal_capacity_Ah=nominal_capacity_Ah, discharge_var=x_axis) #load data into _data attribute
 
-        #store dod limits for cropped fit data
+        #store dod limits for cropped fit data (setters clear the cropped cache)
         self.dod_lower = dod_lower
         self.dod_upper = dod_upper
+
+    @property
+    def dod_lower(self) -> float:
+        return self._dod_lower
+
+    @dod_lower.setter
+    def dod_lower(self, value: float) -> None:
+        self._dod_lower = value
+        self._clear_cropped_cache()
+
+    @property
+    def dod_upper(self) -> float:
+        return self._dod_upper
+
+    @dod_upper.setter
+    def dod_upper(self, value: float) -> None:
+        self._dod_upper = value
+        self._clear_cropped_cache()
+
+    def _clear_cropped_cache(self) -> None:
+        self._cropped_arrays = None
+        self._cropped_df = None
+        self._cropped_groups = None
         
     def load_data(self, file: Union[Path, str], nominal_capacity_Ah: float, discharge_var: DischargeVar) -> None:
         """load excel file containing multiple sheets into single pandas DataFrame of long format
@@ -71,57 +123,117 @@ class DischargeData():
         file = Path(file)
         self.nominal_capacity_Ah = nominal_capacity_Ah
         
-        #first load the workbook and extract the sheetnames
-        wb = load_workbook(filename=file)
-        sheets = wb.sheetnames
-        wb.close()
-        
-        #create empty list to dataframes for each excel sheet to
-        dfs = []
-        
-        #loop over each sheet in the excel file
-        for sheet in sheets:
-            #extract c-rate from sheet name (this assumes sheets are named with convention "c_rate 1.2" or similar)
-            c_rate = float(sheet.split()[-1])
-            #load data into pandas dataframe (we are overwriting the column names specified in the spreadsheet)
-            #the spreadsheet must have a first row of capacity in Ah or DoD and the second column of voltage
-            
-            #load data with generic x-column name (this will be renamed)
-            df = pd.read_excel(file, sheet_name=sheet, names=['x_col', 'V'])
-            
-            if discharge_var is DischargeVar.SOC:
-                df = df.rename(columns={'x_col':'SoC'})
-                df['DoD'] = 1 - df['SoC']
-                
-            elif discharge_var is DischargeVar.DOD:
-                df = df.rename(columns={'x_col':'DoD'})
-                df['SoC'] = 1 - df['DoD']
-                
-            elif discharge_var is DischargeVar.MAH:
-                df['DoD'] = df['x_col']/(self.nominal_capacity_Ah*1000)
-                df['SoC'] = 1 - df['DoD']
-                df = df.drop(columns='x_col')
-                
-            elif discharge_var is DischargeVar.AH:
-                df['DoD'] = df['x_col']/(self.nominal_capacity_Ah)
-                df['SoC'] = 1 - df['DoD']
-                df = df.drop(columns='x_col')
-                
-            else:
-                raise ValueError('Invalid value for discharge_var')
-            
-            #add additional computed columns to the dataframe
-            df['C-rate'] = c_rate
-            df['I [A]'] = df['C-rate']*self.nominal_capacity_Ah
-            
-            dfs.append(df)
-            
-        #combine all of the dataframes into a single dataframe
-        self._data = pd.concat(dfs, ignore_index=True)
+        #parse (or fetch from the module-level cache) every sheet's raw columns
+        sheets = _read_all_sheets(str(file.resolve()), file.stat().st_mtime_ns)
+
+        c_rate_vals = [c_rate for (c_rate, _, _) in sheets]
+        x_parts = [x for (_, x, _) in sheets]
+
+        #combine the per-sheet columns into single contiguous arrays
+        x_col = np.concatenate(x_parts)
+        v = np.concatenate([v_part for (_, _, v_part) in sheets])
+        crate = np.repeat(np.array(c_rate_vals, dtype=np.float32), [part.size for part in x_parts])
+
+        if discharge_var is DischargeVar.SOC:
+            dod = 1.0 - x_col
+        elif discharge_var is DischargeVar.DOD:
+            dod = x_col
+        elif discharge_var is DischargeVar.MAH:
+            dod = x_col/(self.nominal_capacity_Ah*1000)
+        elif discharge_var is DischargeVar.AH:
+            dod = x_col/(self.nominal_capacity_Ah)
+        else:
+            raise ValueError('Invalid value for discharge_var')
+
+        #sort rows by c-rate, then by DoD within each c-rate group, so each
+        #discharge curve is a contiguous slice with monotonically increasing DoD
+        order = np.lexsort((dod, crate))
+        dod = dod[order]
+        v = v[order]
+        crate = crate[order]
+
+        #primary storage is a struct-of-arrays: one contiguous numpy array per
+        #column. Downstream fit/interp code reads these directly without paying
+        #pandas block-manager overhead; DataFrame views are built lazily on demand
+        self._arrays = {'DoD': dod,
+                        'V': v,
+                        'SoC': 1.0 - dod,
+                        'C-rate': crate,
+                        'I [A]': crate*self.nominal_capacity_Ah}
+
+        #precompute the contiguous slice covering each c-rate group
+        bounds = np.flatnonzero(np.diff(crate)) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [crate.size]))
+        #key the slices by the exact c-rates parsed from the sheet names rather
+        #than the float32 column values (keeps labels like 0.2 exact)
+        self._crate_slices = {c_rate: slice(int(start), int(stop))
+                              for c_rate, start, stop in zip(sorted(c_rate_vals), starts, stops)}
+
+        #precompute per-curve (c_rate, DoD, V) views so plotting doesn't need a groupby
+        self._crate_groups = [(c_rate, dod[s], v[s])
+                              for c_rate, s in self._crate_slices.items()]
+
+        #lazily constructed DataFrame wrapper around the arrays
+        self._df = None
+        self._clear_cropped_cache()
     
+    @property
+    def arrays(self) -> dict:
+        """raw column arrays (struct-of-arrays layout, sorted by C-rate)"""
+        return self._arrays
+
+    @property
+    def crate_slices(self) -> dict:
+        """mapping of c-rate to the contiguous slice of rows for that discharge curve"""
+        return self._crate_slices
+
     @property
     def data(self) -> pd.DataFrame:
-        return self._data
+        #DataFrame view is only built if a user explicitly asks for it, and it
+        #wraps the column arrays without copying them
+        if self._df is None:
+            self._df = pd.DataFrame(self._arrays, copy=False)
+        return self._df
+
+    def crate_groups(self, cropped: bool=False) -> list:
+        """per-curve (c_rate, dod, v) array views, optionally cropped to the DoD window"""
+        if not cropped:
+            return self._crate_groups
+        if self._cropped_groups is None:
+            #slice views straight out of the full arrays -- no copy
+            dod, v = self._arrays['DoD'], self._arrays['V']
+            self._cropped_groups = [(c_rate, dod[start:stop], v[start:stop])
+                                    for c_rate, (start, stop)
+                                    in zip(self._crate_slices, self._cropped_spans())]
+        return self._cropped_groups
+
+    def _cropped_spans(self) -> list:
+        """(start, stop) row spans of each c-rate group cropped to the DoD window
+
+        each curve's DoD is sorted ascending, so each crop boundary is a binary
+        search instead of a boolean mask over the whole column
+        """
+        dod = self._arrays['DoD']
+        spans = []
+        for s in self._crate_slices.values():
+            dod_c = dod[s]
+            start = s.start + int(np.searchsorted(dod_c, self.dod_lower, side='right'))
+            stop = s.start + int(np.searchsorted(dod_c, self.dod_upper, side='left'))
+            spans.append((start, stop))
+        return spans
+
+    def data_cropped_arrays(self) -> dict:
+        """extract subset of the raw arrays in the (dod_lower, dod_upper) range of DoD
+
+        the result is cached -- it is only re-evaluated after dod_lower or
+        dod_upper change (their setters clear the cache)
+        """
+        if self._cropped_arrays is None:
+            spans = self._cropped_spans()
+            self._cropped_arrays = {name: np.concatenate([arr[start:stop] for start, stop in spans])
+                                    for name, arr in self._arrays.items()}
+        return self._cropped_arrays
 
     @property
     def data_cropped(self) -> pd.DataFrame:
@@ -134,7 +246,9 @@ class DischargeData():
         dod_upper : float
             upper bound of DoD to chop data for fitting
         """
-        return self.data[(self.data['DoD']>self.dod_lower) & (self.data['DoD']<self.dod_upper)].copy()
+        if self._cropped_df is None:
+            self._cropped_df = pd.DataFrame(self.data_cropped_arrays(), copy=False)
+        return self._cropped_df
     
     
     def plot(self, cropped=False, **kwargs) -> tuple:
@@ -151,14 +265,9 @@ class DischargeData():
             tuple containing the figure and axes objects created
         """
         
-        if cropped:
-            data = self.data_cropped
-        else:
-            data = self.data
-        
         fig, ax = plt.subplots(**kwargs)
-        for (c_rate, df) in data.groupby('C-rate'):
-            ax.plot(df['DoD'], df['V'], label=f'{c_rate} C')
+        for (c_rate, dod, v) in self.crate_groups(cropped=cropped):
+            ax.plot(dod, v, label=f'{c_rate} C')
         
         ax.set_xlabel('DoD [-]')
         ax.set_ylabel('Terminal Voltage [V]')
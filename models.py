@@ -1,11 +1,24 @@
 import numpy as np
-import pandas as pd
+from numpy.polynomial.polynomial import polyval as npp_polyval
 import matplotlib.pyplot as plt
-from sklearn import linear_model
-from scipy.interpolate import interp1d
 from discharge_data import DischargeData
 import abc
 
+try:
+    import _kernels
+except ImportError:  #numba not installed -- fall back to the numpy implementations
+    _kernels = None
+
+def _interp_extrap(x, xp, fp):
+    """np.interp with linear extrapolation beyond the endpoints"""
+    y = np.interp(x, xp, fp)
+    if xp.size >= 2:
+        slope_left = (fp[1] - fp[0])/(xp[1] - xp[0])
+        slope_right = (fp[-1] - fp[-2])/(xp[-1] - xp[-2])
+        y = np.where(x < xp[0], fp[0] + slope_left*(x - xp[0]), y)
+        y = np.where(x > xp[-1], fp[-1] + slope_right*(x - xp[-1]), y)
+    return y
+
 class ModelBase(abc.ABC):
     """abstract base class defining the methods that each model must have"""
     
@@ -21,6 +34,13 @@ class ModelBase(abc.ABC):
     def Vt(self, dod, c_rate):
         pass
 
+    def Vt_batch(self, dod, c_rates):
+        """modeled voltage for every c-rate at every dod: shape (n_c_rates, n_dod)"""
+        ocv = self.OCV(dod)
+        rs = self.Rs(dod)
+        I = np.asarray(c_rates, dtype=np.float64)*self.data.nominal_capacity_Ah
+        return ocv - I[:, None]*rs
+
 class NonParametric(ModelBase):
     
     def __init__(self, data:DischargeData):
@@ -28,10 +48,42 @@ class NonParametric(ModelBase):
         self.data = data #stores DischargeData object
         
         #extract vector of all discharge c_rates
-        self.c_rates = self.data.data['C-rate'].unique()
+        self.c_rates = np.fromiter(self.data.crate_slices, dtype=np.float64)
         #extract vector of currents corresponding to c_rate
-        self.x = self.data.data['I [A]'].unique()
-        
+        self.x = self.c_rates*self.data.nominal_capacity_Ah
+
+        #per-c-rate (DoD, V) interpolation arrays, rebuilt only when the crop changes
+        self._curves = None
+        self._curves_src = None
+
+    def _get_curves(self):
+        """per-c-rate (DoD, V) arrays sorted by DoD for interpolation
+
+        the cached cropped groups are reused as the rebuild key -- DischargeData
+        hands back the same list object until the crop window changes
+        """
+        groups = self.data.crate_groups(cropped=True)
+        if self._curves_src is not groups:
+            #the group views are already sorted by DoD, so they can be used directly
+            curves = {c_rate: (dod_c, v_c) for (c_rate, dod_c, v_c) in groups}
+            self._curves = curves
+
+            #padded 2-D copies of the curves for the numba kernel
+            n_curves = len(self.c_rates)
+            max_len = max(d.size for (d, _) in curves.values())
+            dod_curves = np.zeros((n_curves, max_len))
+            v_curves = np.zeros((n_curves, max_len))
+            lengths = np.empty(n_curves, dtype=np.int64)
+            for j, c_rate in enumerate(self.c_rates):
+                dod_c, v_c = curves[c_rate]
+                dod_curves[j, :dod_c.size] = dod_c
+                v_curves[j, :v_c.size] = v_c
+                lengths[j] = dod_c.size
+            self._padded_curves = (dod_curves, v_curves, lengths)
+
+            self._curves_src = groups
+        return self._curves
+
     def _get_y(self, dod):
         """interpolates voltage for each discharge curve at specified DoD and stacks
         them into a vector"""
@@ -41,26 +93,48 @@ class NonParametric(ModelBase):
         
     def _get_v_terminal(self, dod, c_rate):
         """interpolates raw voltage data at specific c_rate and specified DoD"""
-        
-        df = self.data.data_cropped[self.data.data_cropped['C-rate']==c_rate]
-        f = interp1d(df['DoD'], df['V'], fill_value='extrapolate')
-        
-        return f(dod)
+
+        dod_curve, v_curve = self._get_curves()[c_rate]
+        return _interp_extrap(dod, dod_curve, v_curve)
     
     def _get_params(self, dod):
-        """get ocv and rs for single value of dod by fitting line to data"""    
-        y = self._get_y(dod)
-        p = np.polyfit(self.x, y, deg=1)
-        rs, ocv = p
-        return -rs, ocv
-    
+        """get ocv and rs for single value of dod by fitting line to data"""
+        rs, ocv = self._get_params_vec(np.atleast_1d(dod))
+        return float(rs[0]), float(ocv[0])
+
+    def _get_params_vec(self, dod):
+        """get ocv and rs arrays for an array of dod values in a single pass
+
+        interpolates every discharge curve at every queried dod, then solves the
+        degree-1 least-squares fit in closed form -- the current vector x is shared
+        by every dod, so all fits reduce to one vectorized slope/intercept formula
+        """
+        dod = np.ascontiguousarray(dod, dtype=np.float64)
+        curves = self._get_curves()
+
+        if _kernels is not None:
+            dod_curves, v_curves, lengths = self._padded_curves
+            return _kernels.fit_line_batch(dod, dod_curves, v_curves, lengths, self.x)
+
+        #terminal voltage of each discharge curve at each dod: shape (n_curves, n_dod)
+        Y = np.stack([_interp_extrap(dod, *curves[c_rate]) for c_rate in self.c_rates])
+
+        x_dev = self.x - self.x.mean()
+        y_mean = Y.mean(axis=0)
+        slope = (x_dev[:, None]*(Y - y_mean)).sum(axis=0)/(x_dev**2).sum()
+        intercept = y_mean - slope*self.x.mean()
+
+        return -slope, intercept
+
     def OCV(self, dod):
-        """compute OCV at given dod"""
-        return self._get_params(dod)[1]
-    
+        """compute OCV at given dod (scalar or array)"""
+        ocv = self._get_params_vec(np.atleast_1d(dod))[1]
+        return float(ocv[0]) if np.ndim(dod) == 0 else ocv
+
     def Rs(self, dod):
-        """compute rs at given dod"""
-        return self._get_params(dod)[0]
+        """compute rs at given dod (scalar or array)"""
+        rs = self._get_params_vec(np.atleast_1d(dod))[0]
+        return float(rs[0]) if np.ndim(dod) == 0 else rs
     
     def Vt(self, dod, c_rate):
         """computes modeled voltage at given dod and discharge rate"""
@@ -69,34 +143,41 @@ class NonParametric(ModelBase):
 class PolynomialFit(ModelBase):
     
     def __init__(self, data:DischargeData):
-        
+
         self.data = data  #store discharge data as attribute
-        
-        #create multi-variate linear regression model
-        self.reg_model = linear_model.LinearRegression(fit_intercept=True)
-    
+
     def get_X(self, Ne=9, Nr=9):
         """constructs feature matrix X for performing linear regression"""
-        
-        X = pd.DataFrame()
 
-        for i in range(1, Ne+1):
-            X[f'D^{i}'] = (self.data.data_cropped['DoD'])**i
-            
-        for i in range(Nr+1):
-            X[f'-ID^{i}'] = -self.data.data_cropped['I [A]']*(self.data.data_cropped['DoD'])**i
-            
-        return X
+        cropped = self.data.data_cropped_arrays()
+        #up-cast to float64 -- storage is float32 but the regression is solved
+        #in full precision
+        dod = cropped['DoD'].astype(np.float64)
+        I = cropped['I [A]'].astype(np.float64)
+
+        #build the [D^1 .. D^Ne] and [-I*D^0 .. -I*D^Nr] blocks as two Vandermonde
+        #matrices instead of recomputing DoD**i column-by-column in pandas
+        V_ocv = np.vander(dod, N=Ne+1, increasing=True)[:, 1:]
+        V_rs = -I[:, None]*np.vander(dod, N=Nr+1, increasing=True)
+
+        return np.hstack([V_ocv, V_rs])
     
     def fit_model(self, Ne=9, Nr=9):
         """fits polynomial model of given degree and extracts the fit coefficients
         into an attribute w_vec"""        
         self.Ne = Ne
         self.Nr = Nr
-        self.reg_model.fit(self.get_X(Ne, Nr), y=self.data.data_cropped['V'])
-        w_vec = [self.reg_model.intercept_]
-        w_vec.extend(self.reg_model.coef_)
-        self.w_vec = np.array(w_vec)
+
+        X = self.get_X(Ne, Nr)
+        y = self.data.data_cropped_arrays()['V'].astype(np.float64)
+
+        #prepend a column of ones for the intercept and solve the least-squares
+        #problem directly -- no sklearn validation/copy wrappers in the way
+        X_aug = np.hstack([np.ones((X.shape[0], 1)), X])
+        self.w_vec, *_ = np.linalg.lstsq(X_aug, y, rcond=None)
+        #cache the coefficient slices so evaluations don't re-slice w_vec
+        self._alpha = self.alpha_coeff()
+        self._beta = self.beta_coeff()
         
     def alpha_coeff(self):
         """extracts coefficients from w_vec that correspond to E_0"""
@@ -107,20 +188,27 @@ class PolynomialFit(ModelBase):
         return self.w_vec[self.Ne+1::]        
         
     def OCV(self, dod):
-        #we must reverse the order of the array because numpy expects the
-        #polynomial to start at the highest degree
-        return np.polyval(self.alpha_coeff()[-1::-1], dod)
-    
+        #numpy.polynomial.polynomial.polyval takes ascending coefficients
+        #natively, so no reversed copy of the coefficient array is needed
+        return npp_polyval(dod, self._alpha)
+
     def Rs(self, dod):
-        #we must reverse the order of the array because numpy expects the
-        #polynomial to start at the highest degree
-        return np.polyval(self.beta_coeff()[-1::-1], dod)
+        return npp_polyval(dod, self._beta)
     
     def Vt(self, dod, c_rate):
         """computes modeled voltage at given dod and discharge rate"""
         return self.OCV(dod) - c_rate*(self.data.nominal_capacity_Ah)*self.Rs(dod)
-    
-    
+
+    def Vt_batch(self, dod, c_rates):
+        """modeled voltage for every c-rate at every dod: shape (n_c_rates, n_dod)"""
+        if _kernels is not None:
+            dod = np.ascontiguousarray(dod, dtype=np.float64)
+            c_rates = np.ascontiguousarray(c_rates, dtype=np.float64)
+            return _kernels.modeled_v_batch(dod, c_rates, self._alpha, self._beta,
+                                            self.data.nominal_capacity_Ah)
+        return super().Vt_batch(dod, c_rates)
+
+
 def plot_model_fit(model, **kwargs):
     
     """convenience function that takes in model and plots it's fit over experimental data"""
@@ -129,9 +217,10 @@ def plot_model_fit(model, **kwargs):
     ax.set_prop_cycle(None)
     
     dod = np.linspace(0, 1, 50)
-    for c_rate in model.data.data['C-rate'].unique():
-        v_modeled = model.Vt(dod, c_rate=c_rate)
-        ax.plot(dod, v_modeled, ls='', marker='x', label='Modeled')
+    #evaluate all curves in one batch call, then loop only for the plotting
+    v_modeled = model.Vt_batch(dod, list(model.data.crate_slices))
+    for v_curve in v_modeled:
+        ax.plot(dod, v_curve, ls='', marker='x', label='Modeled')
     
     fig.tight_layout()
     